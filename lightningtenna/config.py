@@ -1,6 +1,7 @@
 import logging
 import logging.handlers
 import os
+from collections import deque
 from configparser import RawConfigParser
 from shutil import copyfile
 
@@ -10,7 +11,8 @@ config_path = home + "/.lightningtenna/"
 
 
 DEFAULT_CONFIG_FILE = config_path + "config.ini"
-SEND_TIMES = []
+# monotonic send times, only as many as the largest per-minute rate limit needs
+SEND_TIMES = deque(maxlen=12)
 UBER = False
 DEBUG = False
 START = None
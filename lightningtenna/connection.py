@@ -5,6 +5,7 @@ import traceback
 from hashlib import sha256
 
 import goTenna
+import simplejson as json
 from termcolor import colored
 
 import config
@@ -390,6 +391,12 @@ class Connection:
         utilities.hexdump(message, send=True)
 
     def send_jumbo(self, message, segment_size=210, private=False, gid=None):
+        try:
+            if not isinstance(message, str):
+                message = json.dumps(message)
+        except Exception as e:
+            logger.error(e)
+            return
         msg_segments = utilities.segment(message, segment_size)
         logger.info(f"Created segmented message with {len(msg_segments)} segments")
         # extra sanity check that we don't relay messages larger than ~1 KB
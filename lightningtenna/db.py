@@ -1,5 +1,7 @@
+import functools
 import logging
 import os
+import sys
 from os.path import expanduser
 
 from sqlalchemy import MetaData, Table, create_engine
@@ -22,33 +24,43 @@ def get_db():
     return db_path
 
 
-def populate_peers_table():
-    """Grab the contents of the peers table
+@functools.lru_cache(maxsize=1)
+def get_engine():
+    """Create the C-Lightning DB engine on first use
     """
-    return Table("peers", metadata, autoload=True, autoload_with=engine)
+    return create_engine(f"sqlite:///{get_db() + 'lightningd.sqlite3'}")
 
 
-def list_peers():
-    """List each peer in the table, converting node_id binary blobs to hex for
-    easier id
+@functools.lru_cache(maxsize=1)
+def get_peers():
+    """Reflect the peers table on first use
     """
-    with engine.connect() as conn:
-        # select the peers table
-        s = select([peers])
-        result = conn.execute(s)
+    engine = get_engine()
+    return Table("peers", MetaData(engine), autoload=True, autoload_with=engine)
 
-        print("Got peers list from C-Lightning database:\n")
 
-        peer_list = []
-        for row in result:
-            peer_list.append(dict(row))
-            # convert node_id bytes to hex
-            peer_list[-1]["node_id"] = peer_list[-1]["node_id"].hex()
+def iter_peers():
+    """Stream each peer's id, node_id and address from the table, converting
+    node_id binary blobs to hex for easier id
+    """
+    peers = get_peers()
+    with get_engine().connect() as conn:
+        s = select([peers.c.id, peers.c.node_id, peers.c.address]).execution_options(
+            stream_results=True
+        )
+        for row in conn.execute(s):
+            yield {"id": row.id, "node_id": row.node_id.hex(), "address": row.address}
 
-        for row in peer_list:
-            print(f"\n{row}")
-        print("\n")
-    return len(peer_list)
+
+def list_peers():
+    """List each peer in the table
+    """
+    lines = [f"\n{row}\n" for row in iter_peers()]
+    # write the whole listing at once rather than a print per peer
+    sys.stdout.write(
+        "Got peers list from C-Lightning database:\n\n" + "".join(lines) + "\n\n"
+    )
+    return len(lines)
 
 
 def modify_peer():
@@ -63,7 +75,8 @@ def modify_peer():
     except TypeError:
         return
 
-    with engine.connect() as conn:
+    peers = get_peers()
+    with get_engine().connect() as conn:
         up = (
             peers.update()
             .where(peers.c.id == to_modify)
@@ -73,9 +86,3 @@ def modify_peer():
             conn.execute(up)
         except IntegrityError as e:
             raise e
-
-
-engine = create_engine(f"sqlite:///{get_db() + 'lightningd.sqlite3'}")
-metadata = MetaData(engine)
-
-peers = populate_peers_table()
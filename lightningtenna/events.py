@@ -80,7 +80,6 @@ class Events:
         m = self.get_all_messages()
         m2 = self.filter_messages(m, jumbo=True)
         message_list = [msg.message.payload.message for msg in m2]
-        message_list.sort()
         return utilities.de_segment(message_list)
 
     def get_all_callback(self):
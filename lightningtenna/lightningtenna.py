@@ -31,6 +31,8 @@ SERVER_PORT = int(cnf["lightning"]["SERVER_PORT"])
 REMOTE_HOST = cnf["lightning"]["REMOTE_HOST"]
 REMOTE_PORT = int(cnf["lightning"]["REMOTE_PORT"])
 CONNECTION_COUNTER = count()
+# socket reads are relayed in small mesh chunks, so avoid trio's 64 KiB default
+SOCKET_RECV_SIZE = 4096
 
 
 logger = logging.getLogger("SERVER")
@@ -41,10 +43,20 @@ async def sender(args):
     """
     socket_stream, _receive_from_thread = args
     logger.info(f"send channel: started!")
-    # get data from the mesh queue
-    async for data in _receive_from_thread:
+    while True:
+        # get data from the mesh queue
+        try:
+            batch = [await _receive_from_thread.receive()]
+        except trio.EndOfChannel:
+            return
+        # coalesce anything else already waiting into the same write
+        try:
+            while True:
+                batch.append(_receive_from_thread.receive_nowait())
+        except (trio.WouldBlock, trio.EndOfChannel):
+            pass
         # send it out via the socket
-        await socket_stream.send_all(data)
+        await socket_stream.send_all(b"".join(batch))
 
 
 async def receiver(args):
@@ -52,9 +64,12 @@ async def receiver(args):
     """
     socket_stream, _send_to_thread = args
     logger.info(f"recv socket: started!")
-    async for data in socket_stream:
+    while True:
+        data = await socket_stream.receive_some(SOCKET_RECV_SIZE)
+        if not data:
+            break
         # add received data to thread_stream queue in RECV_SIZE sized chunks
-        async for chunk in utilities.chunk_to_list(data, RECV_SIZE):
+        for chunk in utilities.chunk_to_list(data, RECV_SIZE):
             # send it to the mesh queue
             await _send_to_thread.send(chunk)
     logger.warning(f"recv socket: connection closed")
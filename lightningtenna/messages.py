@@ -69,7 +69,7 @@ def handle_jumbo_message(conn, message):
     payload = message.payload.message
     # TODO: this cuts out all sender and receiver info -- ADD SENDER GID
     logger.info(f"Received jumbo message fragment")
-    prefix, seq, length, msg = payload.split("/")
+    prefix, seq, length, msg = payload.split("/", 3)
 
     # if a jumbo monitor thread is not running, start one
     if conn.jumbo_thread.is_alive():
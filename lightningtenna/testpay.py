@@ -19,10 +19,11 @@ l1 = LightningRpc(home + "/.lightning/lightning-rpc")
 def get_blocksat_invoice():
     # msg = "Hello, from the mesh!"
     msg = uuid4().hex
+    digest = sha256(msg.encode("ascii")).hexdigest()
     print("Sending a message via the Blockstream Satellite service:")
     print(f'"{msg}"')
     print(f"\nSHA256 message digest:")
-    print(colored(sha256(msg.encode()).hexdigest(), "magenta"))
+    print(colored(digest, "magenta"))
     invoice = blocksat.place(msg, 10000, blocksat.TESTNET_SATELLITE_API)
     if invoice.status_code == 200:
         print("\nGot lightning invoice!")
@@ -1,10 +1,12 @@
 import functools
 import ipaddress
 import logging
+import math
+import queue
 import time
+from collections import namedtuple
 from pprint import pprint
 
-import simplejson as json
 import trio
 from termcolor import colored
 
@@ -14,23 +16,36 @@ logger = logging.getLogger("UTIL")
 mesh_logger = logging.getLogger("MESH")
 
 
-SERVER_PORT = config.CONFIG["lightning"]["SERVER_PORT"]
+SERVER_PORT = int(config.CONFIG["lightning"]["SERVER_PORT"])
 MSG_TYPE = {2: "BROADCAST", 3: "EMERGENCY", 1: "GROUP", 0: "PRIVATE"}
 
+# lookup tables for hexdump, built once at import
+_HEX_BYTES = [f"{x:02x}" for x in range(256)]
+_PRINTABLE = bytes((x if 32 <= x < 127 else 46) for x in range(256))
+
 
 def hexdump(data, recv=None, send=None, length=16):
     """Print a hexdump of data
     """
-    filter = "".join([(len(repr(chr(x))) == 3) and chr(x) or "." for x in range(256)])
+    # don't build the dump at all if it would be filtered out
+    if not (mesh_logger if (recv or send) else logger).isEnabledFor(logging.DEBUG):
+        return
     lines = []
-    digits = 4 if isinstance(data, str) else 2
-    for c in range(0, len(data), length):
-        chars = data[c : c + length]
-        hex = " ".join(["%0*x" % (digits, (x)) for x in chars])
-        printable = "".join(
-            ["%s" % (((x) <= 127 and filter[(x)]) or ".") for x in chars]
-        )
-        lines.append("%04x  %-*s  %s\n" % (c, length * 3, hex, printable))
+    if isinstance(data, str):
+        # rare slow path for str input, each char as 4 hex digits
+        for c in range(0, len(data), length):
+            chars = data[c : c + length]
+            hex = " ".join(["%04x" % ord(x) for x in chars])
+            printable = "".join(
+                [chr(_PRINTABLE[ord(x)]) if ord(x) < 256 else "." for x in chars]
+            )
+            lines.append(f"{c:04x}  {hex:<{length * 3}s}  {printable}\n")
+    else:
+        for c in range(0, len(data), length):
+            chunk = bytes(data[c : c + length])
+            hex = " ".join(map(_HEX_BYTES.__getitem__, chunk))
+            printable = chunk.translate(_PRINTABLE).decode("latin1")
+            lines.append(f"{c:04x}  {hex:<{length * 3}s}  {printable}\n")
     result = "\n" + "".join(lines)
     if recv:
         mesh_logger.debug(colored(result, "cyan"))
@@ -40,45 +55,68 @@ def hexdump(data, recv=None, send=None, length=16):
         logger.debug(result)
 
 
+# compact records for received events and text messages, use ._asdict() where a
+# json-compatible dict is needed
+Event = namedtuple(
+    "Event",
+    [
+        "str",
+        "event_type",
+        "message",
+        "status",
+        "device_details",
+        "disconnect_code",
+        "disconnect_reason",
+        "group",
+        "device_paths",
+    ],
+)
+TextMessage = namedtuple(
+    "TextMessage",
+    [
+        "message",
+        "sender_gid",
+        "sender_gid_type",
+        "time_sent",
+        "counter",
+        "sender_initials",
+        "destination_gid_type",
+        "destination_gid_val",
+        "destination_type",
+        "max_hops",
+    ],
+)
+
+
 def handle_event(evt):
-    return {
-        "__str__": evt.__str__(),
-        "event_type": evt.event_type,
-        "message": evt.message,
-        "status": evt.status,
-        "device_details": evt.device_details,
-        "disconnect_code": evt.disconnect_code,
-        "disconnect_reason": evt.disconnect_reason,
-        "group": evt.group,
-        "device_paths": evt.device_paths,
-    }
+    return Event(
+        str(evt),
+        evt.event_type,
+        evt.message,
+        evt.status,
+        evt.device_details,
+        evt.disconnect_code,
+        evt.disconnect_reason,
+        evt.group,
+        evt.device_paths,
+    )
 
 
 def handle_text_msg(message):
-    msg = message
-    payload = {
-        "message": msg.message.payload.message,
-        "sender": {
-            "gid": msg.message.payload.sender.gid_val,
-            "gid_type": msg.message.payload.sender.gid_type,
-        },
-        "time_sent": str(msg.message.payload.time_sent),
-        "counter": msg.message.payload.counter,
-        "sender_initials": msg.message.payload.sender_initials,
-    }
-    destination = {
-        "gid_type": msg.message.destination.gid_type,
-        "gid_val": msg.message.destination.gid_val,
-        "type": MSG_TYPE[msg.message.destination.gid_type],
-    }
-
-    return {
-        "message": {
-            "destination": destination,
-            "max_hops": msg.message.max_hops,
-            "payload": payload,
-        }
-    }
+    msg = message.message
+    payload = msg.payload
+    return TextMessage(
+        payload.message,
+        payload.sender.gid_val,
+        payload.sender.gid_type,
+        str(payload.time_sent),
+        payload.counter,
+        payload.sender_initials,
+        msg.destination.gid_type,
+        msg.destination.gid_val,
+        MSG_TYPE[msg.destination.gid_type],
+        msg.max_hops,
+    )
 
 
 def cli(func):
@@ -106,6 +144,21 @@ def print_timer(length, interval=1):
         time.sleep(1)
 
 
+async def aprint_timer(length):
+    """Like print_timer, but sleeps with trio so other tasks keep running meanwhile
+    """
+    mesh_logger.info(f"Waiting {length} seconds due to bandwidth restrictions")
+    deadline = trio.current_time() + length
+
+    remaining = length
+    while remaining > 0:
+        if remaining % 10 == 0:
+            mesh_logger.info(f"{remaining} seconds remaining")
+        # only wake when there is something to log, or at the deadline
+        remaining -= remaining % 10 or 10
+        await trio.sleep_until(deadline - max(remaining, 0))
+
+
 def rate_dec(private=False):
 
     def rate_limit(func):
@@ -120,28 +173,22 @@ def rate_dec(private=False):
             else:
                 per_min = 5 if not private else 10
             min_interval = 2
+            now = time.monotonic()
+
+            # keep 'min_interval' since the last send, and if our 'per_min'-th oldest
+            # send is within the last minute, wait for it to expire
+            wait = 0
+            if config.SEND_TIMES:
+                wait = min_interval - (now - config.SEND_TIMES[-1])
+            if len(config.SEND_TIMES) >= per_min:
+                wait = max(wait, 60 - (now - config.SEND_TIMES[-per_min]))
+            if wait > min_interval:
+                print_timer(int(wait) + 1)
+            elif wait > 0:
+                time.sleep(wait)
 
             # add this send time to the list
-            config.SEND_TIMES.append(time.time())
-
-            # if we've not sent before, send!
-            if len(config.SEND_TIMES) <= 1:
-                pass
-
-            # if we've not sent 'per_min' in total, sleep & send!
-            elif len(config.SEND_TIMES) < per_min + 1:
-                time.sleep(min_interval)
-                pass
-
-            # if our 'per_min'-th oldest is older than 'per_min' secs ago, go!
-            elif config.SEND_TIMES[-(per_min + 1)] < (time.time() - 60):
-                time.sleep(min_interval)
-                pass
-
-            # wait the required time
-            else:
-                wait = int(60 - (time.time() - config.SEND_TIMES[-(per_min + 1)])) + 1
-                print_timer(wait)
+            config.SEND_TIMES.append(time.monotonic())
 
             # time.sleep(12)
             # execute the send
@@ -152,35 +199,18 @@ def rate_dec(private=False):
     return rate_limit
 
 
-def segment(msg, segment_size: int):
+def segment(msg: str, segment_size: int):
     """
-    :param msg: string or json-compatible object
+    :param msg: string
     :param segment_size: integer
     :return: list of strings ready for sequential transmission
     """
-    try:
-        if not isinstance(msg, str):
-            msg = json.dumps(msg)
-    except Exception as e:
-        logger.error(e)
-        return
-    prefix = "sm"
-    msg_length = len(msg)
-    if msg_length % segment_size == 0:
-        num_segments = int(msg_length / segment_size)
-    else:
-        num_segments = int((msg_length // segment_size) + 1)
-
-    msg_list = []
-    for i in range(0, msg_length, segment_size):
-        header = f"{prefix}/{(i // segment_size) + 1}/{num_segments}/"
-        msg_list.append(header + msg[i : i + segment_size])
-    return msg_list
-
-
-def sort_segment(val):
-    a, b, c, msg = val.split("/")
-    return int(b)
+    # ceiling division
+    num_segments = -(-len(msg) // segment_size)
+    return [
+        f"sm/{i + 1}/{num_segments}/{msg[i * segment_size : (i + 1) * segment_size]}"
+        for i in range(num_segments)
+    ]
 
 
 def de_segment(segment_list: list):
@@ -188,18 +218,12 @@ def de_segment(segment_list: list):
     :param segment_list: a list of prefixed strings
     :return: prefix-removed, concatenated string
     """
-    # remove erroneous segments
-    for i in segment_list:
-        if not i.startswith("sm/"):
-            del segment_list[i]
-    segment_list.sort(key=sort_segment)
+    # drop erroneous segments and split each header only once
+    parts = [i.split("/", 3) for i in segment_list if i.startswith("sm/")]
+    parts.sort(key=lambda part: int(part[1]))
 
     # remove the header and compile result
-    result = ""
-    for i in segment_list:
-        a, b, c, msg = i.split("/")
-        result += msg
-    return result
+    return "".join(part[3] for part in parts)
 
 
 suffixes = {
@@ -207,6 +231,8 @@ suffixes = {
     "binary": ("KiB", "MiB", "GiB", "TiB", "PiB", "EiB", "ZiB", "YiB"),
     "gnu": "KMGTPEZY",
 }
+# unit sizes for each base, so naturalsize need not exponentiate per call
+_POWERS = {base: [base ** i for i in range(10)] for base in (1000, 1024)}
 
 
 def naturalsize(value, binary=False, gnu=True, format="%.1f"):
@@ -230,15 +256,16 @@ def naturalsize(value, binary=False, gnu=True, format="%.1f"):
     elif bytes < base and gnu:
         return "%dB" % bytes
 
-    for i, s in enumerate(suffix):
-        unit = base ** (i + 2)
-        if bytes < unit and not gnu:
-            return (format + " %s") % ((base * bytes / unit), s)
-        elif bytes < unit and gnu:
-            return (format + "%s") % ((base * bytes / unit), s)
+    powers = _POWERS[base]
+    i = min(len(suffix) - 1, int(math.log(bytes, base)) - 1)
+    # correct any float rounding of the log at exact unit boundaries
+    if i < len(suffix) - 1 and bytes >= powers[i + 2]:
+        i += 1
+    elif bytes < powers[i + 1]:
+        i -= 1
     if gnu:
-        return (format + "%s") % ((base * bytes / unit), s)
-    return (format + " %s") % ((base * bytes / unit), s)
+        return (format + "%s") % (bytes / powers[i + 1], suffix[i])
+    return (format + " %s") % (bytes / powers[i + 1], suffix[i])
 
 
 async def mesh_auto_send(args):
@@ -251,14 +278,20 @@ async def mesh_auto_send(args):
 
 
 async def mesh_to_socket_queue(args):
-    """Hack to move messages from mesh_recv queue and send them back to the socket
+    """Move messages from mesh_recv queue and send them back to the socket. A worker
+    thread blocks on the queue so that trio is only woken when a message arrives
     """
     mesh_queue, socket_queue = args
     while True:
-        if mesh_queue.empty():
-            await trio.sleep(0.5)
-        else:
-            await socket_queue.send(mesh_queue.get())
+        batch = [await trio.to_thread.run_sync(mesh_queue.get, cancellable=True)]
+        # drain any burst already queued without another thread hand-off each
+        try:
+            while True:
+                batch.append(mesh_queue.get_nowait())
+        except queue.Empty:
+            pass
+        for item in batch:
+            await socket_queue.send(item)
 
 
 def print_list(my_list):
@@ -268,11 +301,17 @@ def print_list(my_list):
         print(c, v)
 
 
-async def chunk_to_list(data, chunk_len):
-    """Adds data of arbitrary length to a queue in a certain chunk size
+def chunk_to_list(data, chunk_len):
+    """Yields data of arbitrary length in "ltng"-prefixed chunks of a certain size
     """
-    for i in range(0, len(data), chunk_len):
-        yield (b"ltng" + data[i : i + chunk_len])
+    view = memoryview(data)
+    buf = bytearray(b"ltng" + bytes(chunk_len))
+    out = memoryview(buf)
+    for i in range(0, len(view), chunk_len):
+        chunk = view[i : i + chunk_len]
+        end = 4 + len(chunk)
+        buf[4:end] = chunk
+        yield bytes(out[:end])
 
 
 def get_id_addr_port(peer_len):
@@ -290,6 +329,9 @@ def get_id_addr_port(peer_len):
             input("What ip address should we assign them? (default: 127.0.0.1): ")
             or "127.0.0.1"
         )
+        # the default needs no validation
+        if address == "127.0.0.1":
+            break
         try:
             ipaddress.ip_address(address)
             break
@@ -305,9 +347,12 @@ def get_id_addr_port(peer_len):
                 )
                 or SERVER_PORT
             )
+            if port == SERVER_PORT:
+                break
             if not port.isdigit():
                 raise TypeError
-            if 1 <= int(port) <= 65535:
+            port = int(port)
+            if 1 <= port <= 65535:
                 break
             else:
                 raise ValueError